@@ -1,12 +1,15 @@
 import dowhy
 from dowhy import CausalModel
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import networkx as nx
+import graphviz
 import io
 import base64
 import numpy as np
 import math
+import threading
+from scipy import stats
 
 
 def safe_float(val):
@@ -18,7 +21,7 @@ def safe_float(val):
         if val.size == 1:
             val = val.item()
         else:
-            return [safe_float(x) for x in val]
+            return safe_float_array(val)
 
     try:
         f_val = float(val)
@@ -29,6 +32,25 @@ def safe_float(val):
         return None
 
 
+def safe_float_array(values):
+    """Vectorized safe_float: native floats, with NaN/inf replaced by None."""
+    try:
+        arr = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Non-numeric elements: keep safe_float's per-element None semantics
+        return [safe_float(x) for x in values]
+    out = arr.astype(object)
+    out[~np.isfinite(arr)] = None
+    return out.tolist()
+
+
+def _to_float_array(series: pd.Series) -> np.ndarray:
+    """Float64 view of a column, coercing non-numeric values to NaN only when needed."""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
 def compute_uplift_summary(df: pd.DataFrame, treatment: str, outcome: str):
     """Compute simple uplift diagnostics (treated vs. control means)."""
     summary = None
@@ -36,26 +58,28 @@ def compute_uplift_summary(df: pd.DataFrame, treatment: str, outcome: str):
     if treatment not in df.columns or outcome not in df.columns:
         return summary
 
-    outcomes = pd.to_numeric(df[outcome], errors="coerce")
-    treatment_series = pd.to_numeric(df[treatment], errors="coerce")
+    t = _to_float_array(df[treatment])
+    o = _to_float_array(df[outcome])
 
-    data = pd.DataFrame({"treatment": treatment_series, "outcome": outcomes}).dropna()
-    if data.empty:
+    mask = np.isfinite(t) & np.isfinite(o)
+    t, o = t[mask], o[mask]
+    if t.size == 0:
         return summary
 
-    treated = data[data["treatment"] >= 0.5]
-    control = data[data["treatment"] < 0.5]
-    if treated.empty or control.empty:
+    treated_mask = t >= 0.5
+    ot = o[treated_mask]
+    oc = o[~treated_mask]
+    if ot.size == 0 or oc.size == 0:
         return summary
 
-    treated_mean = treated["outcome"].mean()
-    control_mean = control["outcome"].mean()
+    treated_mean = ot.mean()
+    control_mean = oc.mean()
     absolute_uplift = treated_mean - control_mean
 
-    treated_var = treated["outcome"].var(ddof=1)
-    control_var = control["outcome"].var(ddof=1)
-    treated_n = len(treated)
-    control_n = len(control)
+    treated_n = ot.size
+    control_n = oc.size
+    treated_var = np.var(ot, ddof=1) if treated_n > 1 else np.nan
+    control_var = np.var(oc, ddof=1) if control_n > 1 else np.nan
 
     se = None
     if treated_n > 1 and control_n > 1:
@@ -83,11 +107,151 @@ def compute_uplift_summary(df: pd.DataFrame, treatment: str, outcome: str):
         "treatment_count": int(treated_n),
         "control_count": int(control_n),
         "standard_error": safe_float(se),
-        "approximate_confidence_interval": [safe_float(x) for x in approx_ci] if approx_ci else None,
+        "approximate_confidence_interval": safe_float_array(approx_ci) if approx_ci else None,
     }
 
     return summary
 
+# (model, identified_estimand) per graph spec, for the most recent DataFrame only.
+# Identification is deterministic in the graph, so it only needs to run once.
+# Entries are dropped as soon as a different frame is analyzed, so replaced
+# datasets are not kept alive. While entries exist their models reference the
+# frame, so its id() cannot be recycled by another DataFrame.
+_model_cache = {}
+_model_cache_frame = None
+_model_cache_lock = threading.Lock()
+_MODEL_CACHE_SIZE = 16
+
+
+def _get_identified_model(df: pd.DataFrame, treatment: str, outcome: str, confounders: list):
+    """Return a cached (CausalModel, identified_estimand) pair, building it on a miss."""
+    global _model_cache_frame
+    frame = (id(df), len(df), tuple(df.columns))
+    key = (treatment, outcome, frozenset(confounders))
+
+    # Held across the build too: /analyze calls this from worker threads
+    with _model_cache_lock:
+        if frame != _model_cache_frame:
+            _model_cache.clear()
+            _model_cache_frame = frame
+
+        cached = _model_cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = CausalModel(
+            data=df,
+            treatment=treatment,
+            outcome=outcome,
+            common_causes=confounders
+        )
+        identified_estimand = model.identify_effect(proceed_when_unidentifiable=True)
+
+        if len(_model_cache) >= _MODEL_CACHE_SIZE:
+            _model_cache.pop(next(iter(_model_cache)))
+        _model_cache[key] = (model, identified_estimand)
+        return model, identified_estimand
+
+
+def _is_numeric_frame(df: pd.DataFrame, columns: list) -> bool:
+    return all(pd.api.types.is_numeric_dtype(df[c]) for c in columns)
+
+
+def _confounder_matrix(df: pd.DataFrame, confounders: list):
+    """
+    Confounder block of the design matrix. Categorical columns are expanded to
+    k-1 indicator columns as DoWhy's encoder does (missing values form their own
+    level), but only once per analysis rather than on every estimator refit.
+    Returns None for column types the NumPy path does not handle.
+    """
+    blocks = [np.empty((len(df), 0))]
+    for c in confounders:
+        col = df[c]
+        if pd.api.types.is_numeric_dtype(col):
+            blocks.append(col.to_numpy(dtype=np.float64, na_value=np.nan)[:, None])
+        elif pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col) or isinstance(col.dtype, pd.CategoricalDtype):
+            codes, uniques = pd.factorize(col, use_na_sentinel=False)
+            blocks.append((codes[:, None] == np.arange(1, len(uniques))).astype(np.float64))
+        else:
+            return None
+    return np.hstack(blocks)
+
+
+# Placebo simulations are processed in blocks of at most this many matrix elements
+_PLACEBO_BLOCK_SIZE = 1 << 22
+
+
+def _placebo_linear_backdoor(X: np.ndarray, y: np.ndarray, num_simulations=100, random_state=None) -> float:
+    """
+    Mean OLS treatment coefficient over randomly permuted treatments, i.e. the
+    placebo_treatment_refuter's new_effect for a linear backdoor model.
+    By Frisch-Waugh-Lovell each refit reduces to regressing the residualized
+    outcome on the residualized placebo treatment, so the intercept/confounder
+    projection is computed once and all simulations share a single matmul.
+    """
+    t = X[:, 1]
+    Q, _ = np.linalg.qr(np.delete(X, 1, axis=1))
+    y_res = y - Q @ (Q.T @ y)
+
+    rng = np.random.default_rng(random_state)
+    n = t.shape[0]
+    block = max(1, _PLACEBO_BLOCK_SIZE // n)
+    effects = np.empty(num_simulations)
+    for start in range(0, num_simulations, block):
+        k = min(block, num_simulations - start)
+        placebo = rng.permuted(np.tile(t, (k, 1)), axis=1)
+        placebo -= (placebo @ Q) @ Q.T
+        effects[start:start + k] = (placebo @ y_res) / np.einsum('ij,ij->i', placebo, placebo)
+    return effects.mean()
+
+
+def _fast_linear_backdoor(df: pd.DataFrame, treatment: str, outcome: str, confounders: list, confidence_level=0.95):
+    """
+    Backdoor-adjusted ATE via a single least-squares fit of outcome ~ 1 + T + C.
+    Mirrors DoWhy's backdoor.linear_regression (OLS coefficient on T with
+    t-based p-value and interval) without the estimator/encoding overhead.
+    Also runs the placebo refutation on the same design matrix.
+    Returns None when the design is rank deficient so callers can fall back.
+    """
+    C = _confounder_matrix(df, confounders)
+    if C is None:
+        return None
+
+    X = np.column_stack([
+        np.ones(len(df)),
+        df[treatment].to_numpy(dtype=np.float64, na_value=np.nan),
+        C,
+    ])
+    y = df[outcome].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    mask = np.isfinite(X).all(axis=1) & np.isfinite(y)
+    X, y = X[mask], y[mask]
+    n, k = X.shape
+    dof = n - k
+    if dof <= 0:
+        return None
+
+    beta, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+    if rank < k:
+        return None
+
+    residuals = y - X @ beta
+    sigma2 = residuals @ residuals / dof
+    std_error = math.sqrt(sigma2 * np.linalg.inv(X.T @ X)[1, 1])
+
+    value = beta[1]
+    t_crit = stats.t.ppf(0.5 + confidence_level / 2, dof)
+    p_value = 2 * stats.t.sf(abs(value / std_error), dof) if std_error > 0 else None
+
+    return {
+        "value": value,
+        "std_error": std_error,
+        # Same (n_treatments, 2) layout DoWhy returns
+        "confidence_intervals": np.array([[value - t_crit * std_error, value + t_crit * std_error]]),
+        "p_value": p_value,
+        "placebo_effect": _placebo_linear_backdoor(X, y),
+    }
+
 def estimate_causal_effect(df: pd.DataFrame, treatment: str, outcome: str, confounders: list):
     """
     Runs the full Causal Inference pipeline: Model -> Identify -> Estimate -> Refute.
@@ -97,80 +261,125 @@ def estimate_causal_effect(df: pd.DataFrame, treatment: str, outcome: str, confo
     uplift_summary = compute_uplift_summary(df, treatment, outcome)
 
     # 1. Create Causal Model
-    model = CausalModel(
-        data=df,
-        treatment=treatment,
-        outcome=outcome,
-        common_causes=confounders
-    )
-    
     # 2. Identify Causal Effect
-    identified_estimand = model.identify_effect(proceed_when_unidentifiable=True)
+    model, identified_estimand = _get_identified_model(df, treatment, outcome, confounders)
     
     # 3. Estimate Causal Effect
-    # Using Linear Regression as a robust default
-    estimate = model.estimate_effect(
-        identified_estimand,
-        method_name="backdoor.linear_regression",
-        test_significance=True,
-        confidence_intervals=True
-    )
+    # Using Linear Regression as a robust default. For backdoor-identified
+    # graphs with numeric treatment/outcome the OLS fit is done directly in NumPy.
+    fast = None
+    if identified_estimand.estimands.get("backdoor") is not None and _is_numeric_frame(df, [treatment, outcome]):
+        fast = _fast_linear_backdoor(df, treatment, outcome, confounders)
+
+    if fast is not None:
+        estimate_value = fast["value"]
+        conf_ints = fast["confidence_intervals"]
+        p_value = fast["p_value"]
+        # 4. Refute Estimate (Robustness Check), vectorized placebo treatment
+        refutation_result = fast["placebo_effect"]
+    else:
+        estimate = model.estimate_effect(
+            identified_estimand,
+            method_name="backdoor.linear_regression",
+            test_significance=True,
+            confidence_intervals=True
+        )
+        estimate_value = estimate.value
+        conf_ints = estimate.get_confidence_intervals()
+        significance = estimate.test_stat_significance()
+        p_value = significance['p_value'] if significance else None
     
-    # 4. Refute Estimate (Robustness Check)
-    # Placebo Treatment Refuter
-    refutation = model.refute_estimate(
-        identified_estimand,
-        estimate,
-        method_name="placebo_treatment_refuter"
-    )
+        # 4. Refute Estimate (Robustness Check)
+        # Placebo Treatment Refuter, simulations fanned out over all cores via joblib
+        refutation = model.refute_estimate(
+            identified_estimand,
+            estimate,
+            method_name="placebo_treatment_refuter",
+            n_jobs=-1
+        )
+        refutation_result = refutation.new_effect if refutation is not None else None
 
-    conf_ints = estimate.get_confidence_intervals()
     if conf_ints is not None:
-        conf_ints = [safe_float(x) for x in conf_ints]
+        conf_ints = safe_float_array(conf_ints)
 
     if (not conf_ints or any(val is None for val in conf_ints)) and uplift_summary and uplift_summary.get("approximate_confidence_interval"):
         conf_ints = uplift_summary["approximate_confidence_interval"]
 
     return {
-        "estimate_value": safe_float(estimate.value),
+        "estimate_value": safe_float(estimate_value),
         "confidence_intervals": conf_ints,
-        "p_value": safe_float(estimate.test_stat_significance()['p_value']) if estimate.test_stat_significance() else None,
-        "refutation_result": safe_float(refutation.new_effect) if refutation is not None else None,
+        "p_value": safe_float(p_value),
+        "refutation_result": safe_float(refutation_result),
         "uplift_summary": uplift_summary
     }
 
-def get_causal_graph_image(df: pd.DataFrame, treatment: str, outcome: str, confounders: list) -> str:
+def _dot_id(name) -> str:
+    """Quote a column name as a DOT identifier."""
+    return '"' + str(name).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def get_causal_graph_dot(treatment: str, outcome: str, confounders: list) -> str:
     """
-    Generates a visual representation of the causal graph.
-    Returns a base64 encoded PNG string.
+    Builds the causal graph as a Graphviz DOT string.
+    The layout is static (confounders -> treatment -> outcome), so no
+    iterative layout pass is needed.
     """
-    # Sanitize inputs
-    confounders = [c for c in confounders if c != treatment and c != outcome]
+    t, o = _dot_id(treatment), _dot_id(outcome)
+    lines = [
+        "digraph G {",
+        "  node [style=filled, fillcolor=lightgrey, fontname=\"Helvetica-Bold\"];",
+        f"  {t} [fillcolor=skyblue];",
+        f"  {o} [fillcolor=lightgreen];",
+    ]
+    for c in confounders:
+        lines.append(f"  {_dot_id(c)} -> {t};")
+        lines.append(f"  {_dot_id(c)} -> {o};")
+    lines.append(f"  {t} -> {o};")
+    lines.append("}")
+    return "\n".join(lines)
+
 
-    # Create a directed graph
+def _render_graph_matplotlib(treatment: str, outcome: str, confounders: list) -> bytes:
+    """Fallback renderer for hosts without the Graphviz `dot` executable."""
+    # Create a directed graph, adding edges and node attributes in bulk
     G = nx.DiGraph()
+    G.add_edges_from(
+        [(c, treatment) for c in confounders]
+        + [(c, outcome) for c in confounders]
+        + [(treatment, outcome)]
+    )
+    colors = {c: 'lightgrey' for c in confounders}
+    colors[treatment] = 'skyblue'
+    colors[outcome] = 'lightgreen'
+    nx.set_node_attributes(G, colors, name='color')
+    nx.set_node_attributes(G, 'filled', name='style')
     
-    # Add nodes
-    G.add_node(treatment, color='skyblue', style='filled')
-    G.add_node(outcome, color='lightgreen', style='filled')
-    for c in confounders:
-        G.add_node(c, color='lightgrey', style='filled')
-        G.add_edge(c, treatment)
-        G.add_edge(c, outcome)
-        
-    G.add_edge(treatment, outcome)
-    
-    # Draw
-    plt.figure(figsize=(8, 6))
+    # Draw on a standalone Figure: pyplot's global state is not thread-safe
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.set_axis_off()
     pos = nx.spring_layout(G)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=2000, font_size=10, font_weight='bold', arrows=True)
+    nx.draw(G, pos, ax=ax, with_labels=True, node_color='lightblue', node_size=2000, font_size=10, font_weight='bold', arrows=True)
     
     # Save to buffer
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def get_causal_graph_image(df: pd.DataFrame, treatment: str, outcome: str, confounders: list) -> str:
+    """
+    Generates a visual representation of the causal graph.
+    Returns a base64 encoded PNG string.
+    """
+    # Sanitize inputs
+    confounders = [c for c in confounders if c != treatment and c != outcome]
+
+    try:
+        png = graphviz.Source(get_causal_graph_dot(treatment, outcome, confounders)).pipe(format='png')
+    except graphviz.ExecutableNotFound:
+        png = _render_graph_matplotlib(treatment, outcome, confounders)
     
     # Encode
-    image_base64 = base64.b64encode(buf.read()).decode('utf-8')
+    image_base64 = base64.b64encode(png).decode('utf-8')
     return image_base64